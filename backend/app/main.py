@@ -2,6 +2,8 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 # Import routers
 from .routers import bus_data
@@ -15,6 +17,7 @@ app = FastAPI(
     contact={
         "name": "Michael",
     },
+    default_response_class=ORJSONResponse, # orjson serializes large list payloads much faster than json.dumps
 )
 
 # --- CORS Configuration ---
@@ -24,14 +27,22 @@ origins = [
     "http://127.0.0.1:8080",
 ]
 
+# The API is GET-only and cookie-less: no credentials, an explicit header
+# allow-list instead of "*", and max_age so browsers cache preflight results
+# for a day instead of re-asking before requests.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
-    allow_credentials=True,
+    allow_credentials=False,
     allow_methods=["GET"],
-    allow_headers=["*"],
+    allow_headers=["Content-Type"],
+    max_age=86400,
 )
 
+# Compress larger JSON bodies (/bus-data, /stop-names) on the wire; tiny
+# responses skip compression via minimum_size so they don't pay the CPU cost
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # --- Include Routers ---
 app.include_router(bus_data.router)
 app.include_router(prediction.router) # <-- ADD THIS LINE
@@ -44,4 +55,18 @@ async def read_root():
 
 # --- How to Run ---
 # Navigate to the 'backend' directory
-# Run: uvicorn app.main:app --reload --host 127.0.0.1 --port 8000
+# Development: uvicorn app.main:app --reload --host 127.0.0.1 --port 8000
+# Serving:     uvicorn app.main:app --workers $(nproc) --loop uvloop --http httptools --host 127.0.0.1 --port 8000
+# (uvicorn[standard] installs uvloop + httptools; uvicorn picks them up automatically,
+# the explicit flags just guard against a bare uvicorn install falling back to asyncio)
+# A single worker is GIL-bound, so CPU work in the handlers serializes all clients
+# through one core; --workers forks one process per core and each worker re-runs
+# the import-time data/model load, so no state needs to be shared between them.
+# Per-worker memory stays modest by design: the loaders keep ~12 bytes/row of
+# typed arrays plus small dict indexes (the raw DataFrame is released after
+# load), and read-only file-backed state — the parquet sidecar during load and
+# the memory-mapped model curve at runtime — is shared between workers through
+# the OS page cache, so explicit multiprocessing.shared_memory plumbing isn't
+# warranted at this data size.
+# Equivalent gunicorn invocation:
+#   gunicorn -k uvicorn.workers.UvicornWorker -w $((2*$(nproc)+1)) app.main:app
@@ -1,20 +1,40 @@
 # backend/app/routers/bus_data.py
 
-import csv
-import math
+import hashlib
 import logging
+import threading
+import time
+from functools import lru_cache
+from itertools import compress
 from pathlib import Path
-from collections import defaultdict
-from typing import List, Dict, Any, Optional
-from datetime import datetime, time # Import datetime objects
-
-from fastapi import APIRouter, HTTPException, Query
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+
+import numpy as np
+import orjson
+import pandas as pd
+
+try:
+    # Optional fast path: Arrow's C++ CSV reader tokenizes in native code and
+    # streams record batches, so large files parse faster with bounded memory.
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 # --- Configuration ---
 CURRENT_DIR = Path(__file__).parent
 BACKEND_DIR = CURRENT_DIR.parent.parent
 CSV_FILE_PATH = BACKEND_DIR / "data" / "busDatabase2.csv"
+# Preprocessed sidecar written after the first successful CSV parse; loading it
+# skips tokenizing/validating the CSV on every worker start and --reload cycle.
+# The version tag in the name invalidates sidecars whose persisted derived
+# columns predate a fix (v2: sched_seconds computed unit-proof).
+PARQUET_SIDECAR_PATH = CSV_FILE_PATH.with_suffix(".v2.parquet")
 
 # --- Column Names ---
 # !! IMPORTANT: Verify these match your busDatabase.csv headers exactly !!
@@ -24,7 +44,16 @@ COL_ROUTE = "published_line"
 COL_DELAY_MINUTES = "scheduled_delay_minutes" # Used for chart AND now for filter result
 COL_HOUR = "hour_of_day"
 COL_SCHEDULED_ARRIVAL = "scheduled_arrival"
-COL_PREDICTION_ERROR = "prediction_error_minutes" # Still loaded if needed elsewhere
+
+# --- Derived Columns (added to the frame at load time) ---
+COL_SCHED_SECONDS = "sched_seconds" # scheduled arrival as seconds-of-day (int32)
+COL_SCHED_STR = "scheduled_arrival_str" # original 'YYYY-MM-DD HH:MM:SS' string for responses
+
+# All columns the loader requires from the CSV, built once at import
+REQUIRED_COLUMNS = frozenset({
+    COL_STOP_NAME, COL_BUS_ID, COL_ROUTE,
+    COL_DELAY_MINUTES, COL_HOUR, COL_SCHEDULED_ARRIVAL,
+})
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -33,11 +62,55 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # --- Data Storage ---
-BUS_DATA: List[Dict[str, Any]] = []
+DATA_LOADED: bool = False # flipped once the SoA arrays and indexes are built
 data_load_error: Optional[str] = None
+_LOAD_LOCK = threading.Lock() # guards the one-time load under concurrent callers
+
+# SoA column arrays extracted from the parsed frame — only the columns some
+# consumer actually reads after load. They cost a few bytes of raw data per
+# row where the old list-of-dicts spent a few hundred bytes of Python object
+# overhead, and they keep aggregations on SIMD-friendly paths. Delays fit
+# comfortably in float32 (two display decimals), seconds-of-day in int32.
+STOP_CODES: np.ndarray = np.empty(0, dtype=np.int32) # index into STOP_CATEGORIES
+DELAYS: np.ndarray = np.empty(0, dtype=np.float32)
+# Sorted unique scheduled seconds-of-day; prediction.py binary-searches this
+# for "next scheduled time" instead of scanning a per-row column
+UNIQUE_SCHED_SECONDS: np.ndarray = np.empty(0, dtype=np.int32)
+STOP_CATEGORIES: List[str] = [] # codebook: stop code -> stop name
+ROUTE_CATEGORIES: List[str] = [] # codebook: route code -> route name
 UNIQUE_STOP_NAMES: List[str] = [] # Cache for stop names
+UNIQUE_ROUTES: List[str] = [] # Cache for route names (filter dropdowns)
+# Per-(stop, route) arrival index entry: parallel arrays sorted by seconds-of-day.
+# A NamedTuple gives the hot path direct slot access instead of dict hashing.
+class RouteArrivals(NamedTuple):
+    seconds: np.ndarray
+    bus_ids: np.ndarray
+    arrivals: np.ndarray
+
+# stop_name -> route -> RouteArrivals, for O(log n) searchsorted lookups
+STOP_ROUTE_INDEX: Dict[str, Dict[str, RouteArrivals]] = {}
+# (stop_name, route, arrival_str) -> mean scheduled delay, built in one groupby
+SCHED_DELAY_MEAN: Dict[Tuple[str, str, str], float] = {}
+UNIQUE_HOURS: List[int] = [] # Cache for hour filter dropdown
+# (route, hour) -> (average_delay_minutes, first_scheduled_arrival), built once
+# at load; a plain tuple per key instead of a dict keeps the index compact
+ROUTE_HOUR_STATS: Dict[Tuple[str, int], Tuple[float, str]] = {}
+# Constant payloads serialized once at load; served with ETag/Cache-Control
+CHART_BYTES: bytes = b""
+CHART_ETAG: str = ""
+STOP_NAMES_BYTES: bytes = b""
+STOP_NAMES_ETAG: str = ""
+FILTER_OPTS_BYTES: bytes = b""
+FILTER_OPTS_ETAG: str = ""
+# Header dicts built once alongside the payloads, so handlers don't rebuild them
+CHART_HEADERS: Dict[str, str] = {}
+STOP_NAMES_HEADERS: Dict[str, str] = {}
+FILTER_OPTS_HEADERS: Dict[str, str] = {}
 
 # --- Pydantic Models ---
+# These models only feed the OpenAPI schema (/docs). The endpoints return
+# pre-serialized orjson bytes via Response, so no per-request
+# model construction or validation runs on the hot paths.
 
 # Model for the stop delay chart endpoint
 class StopDelayChartDataResponse(BaseModel):
@@ -71,110 +144,351 @@ class StopScheduleResponse(BaseModel):
 class StopNamesResponse(BaseModel):
     stop_names: List[str] = Field(..., description="List of unique stop names found in the data.")
 
+# Model for the filter options endpoint
+class FilterOptionsResponse(BaseModel):
+    routes: List[str] = Field(..., description="List of unique route identifiers found in the data.")
+    hours: List[int] = Field(..., description="List of hours (0-23) present in the data.")
+
+# Model for the find-arrival endpoint
+class FindArrivalResponse(BaseModel):
+    route: str = Field(..., description="The requested bus route identifier.")
+    hour: int = Field(..., description="The requested hour of day (0-23).")
+    average_delay_minutes: float = Field(
+        ..., description="Average scheduled delay (in minutes) for this route during this hour."
+    )
+    first_scheduled_arrival: str = Field(
+        ..., description="Earliest scheduled arrival recorded for this route during this hour."
+    )
+
 
 # --- Data Loading Function ---
+CSV_CHUNK_SIZE = 500_000 # rows per chunk; bounds peak memory during CSV ingestion
+
+
+def _validate_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Applies the vectorized conversions and validity mask to one CSV chunk.
+
+    to_datetime with an explicit format and errors="coerce" subsumes the old
+    per-row length preflight + strptime: malformed arrivals surface as NaT in
+    one C pass and the mask drops them.
+    """
+    # Vectorized conversions; bad values become NaN/NaT and are dropped below.
+    # The text columns already arrive as string dtype (read_csv dtype= hint),
+    # so stripping is the only pass needed here.
+    for col in (COL_STOP_NAME, COL_BUS_ID, COL_ROUTE):
+        df[col] = df[col].str.strip()
+    df[COL_HOUR] = pd.to_numeric(df[COL_HOUR], errors="coerce")
+    df[COL_DELAY_MINUTES] = pd.to_numeric(df[COL_DELAY_MINUTES], errors="coerce")
+    # cache=True dedupes repeated timestamp strings (many rows share a schedule)
+    df[COL_SCHEDULED_ARRIVAL] = pd.to_datetime(
+        df[COL_SCHEDULED_ARRIVAL], format="%Y-%m-%d %H:%M:%S", errors="coerce", cache=True
+    )
+
+    # Vectorized validation masks (same rules the old per-row loop enforced),
+    # each materialized as a plain bool ndarray (na_value pins NA to "drop")
+    # so .loc skips the nullable-boolean machinery and the per-rule masks can
+    # be counted for the debug breakdown below.
+    text_ok = (
+        df[COL_STOP_NAME].notna() & df[COL_STOP_NAME].ne("")
+        & df[COL_BUS_ID].notna() & df[COL_BUS_ID].ne("")
+        & df[COL_ROUTE].notna() & df[COL_ROUTE].ne("")
+    ).to_numpy(dtype=bool, na_value=False)
+    hour_ok = df[COL_HOUR].between(0, 23).to_numpy(dtype=bool, na_value=False)
+    delay_ok = np.isfinite(df[COL_DELAY_MINUTES].to_numpy(dtype="float64", na_value=np.nan))
+    arrival_ok = df[COL_SCHEDULED_ARRIVAL].notna().to_numpy(dtype=bool)
+    valid = text_ok & hour_ok & delay_ok & arrival_ok
+    # Only the aggregate skip count is logged per load (by the caller); the
+    # per-rule breakdown is computed solely when DEBUG logging is on.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Chunk validation kept %d/%d rows (dropped: text %d, hour %d, delay %d, arrival %d)",
+            int(valid.sum()), len(df),
+            int((~text_ok).sum()), int((~hour_ok).sum()),
+            int((~delay_ok).sum()), int((~arrival_ok).sum()),
+        )
+    return df.loc[valid]
+
+
+def _read_csv_arrow() -> "tuple[int, List[pd.DataFrame]]":
+    """Parses the CSV with pyarrow's parallel C++ reader, then validates per batch.
+
+    read_csv splits the file into blocks aligned to record boundaries and
+    decodes them across all cores; the raw string table briefly lives in
+    memory, but this path only runs when the parquet sidecar is cold.
+    Every column is read as a string so _validate_chunk applies exactly the
+    same coercion rules as the pandas path.
+    """
+    raw_count = 0
+    chunks: List[pd.DataFrame] = []
+    read_options = pa_csv.ReadOptions(use_threads=True)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=sorted(REQUIRED_COLUMNS),
+        # Plain strings rather than pa.dictionary(): the validator's
+        # strip/coerce passes run before values are final, so encoding here
+        # would dictionary-encode pre-strip values and then be redone anyway.
+        # The loader's post-validation astype("category") dictionary-encodes
+        # the repetitive text columns exactly once, after cleaning.
+        column_types={col: pa.string() for col in REQUIRED_COLUMNS},
+        # Match the pandas reader, which turns empty fields into NA
+        strings_can_be_null=True,
+    )
+    table = pa_csv.read_csv(
+        CSV_FILE_PATH, read_options=read_options, convert_options=convert_options
+    )
+    for batch in table.to_batches(max_chunksize=CSV_CHUNK_SIZE):
+        chunk = batch.to_pandas()
+        raw_count += len(chunk)
+        chunks.append(_validate_chunk(chunk))
+    return raw_count, chunks
+
+
+def _parse_and_validate_csv():
+    """Parses and validates the CSV, returning (df, skipped_count).
+
+    Both readers (Arrow fast path, chunked pandas fallback) tokenize in C;
+    no stdlib csv iteration remains anywhere in the loader.
+    """
+    # Check the header first so a missing column gives a clear error message
+    header_df = pd.read_csv(CSV_FILE_PATH, nrows=0, encoding="utf-8-sig")
+    missing = REQUIRED_COLUMNS.difference(header_df.columns)
+    if missing:
+        available = list(header_df.columns)
+        raise ValueError(
+            f"Missing required columns: {missing}. Available columns: {available}"
+        )
+
+    # Vectorized parse: pandas' C tokenizer replaces the per-row
+    # csv.DictReader + int()/float()/strptime() Python loop. Reading in chunks
+    # keeps peak memory near one chunk's footprint while rows that fail
+    # validation are dropped before concatenation, so a growing CSV can't
+    # blow up worker boot.
+    raw_count = 0
+    chunks = None
+    if pa_csv is not None:
+        try:
+            raw_count, chunks = _read_csv_arrow()
+        except Exception as e:
+            logger.warning(f"pyarrow CSV reader failed ({e}); falling back to pandas parser.")
+            raw_count, chunks = 0, None
+    if chunks is None:
+        chunks = []
+        # The context manager unmaps the file as soon as the last chunk is
+        # tokenized instead of holding it until the reader is garbage-collected
+        with pd.read_csv(
+            CSV_FILE_PATH,
+            usecols=list(REQUIRED_COLUMNS),
+            dtype={COL_STOP_NAME: "string", COL_BUS_ID: "string", COL_ROUTE: "string"},
+            encoding="utf-8-sig",
+            chunksize=CSV_CHUNK_SIZE,
+            memory_map=True, # tokenize straight off mapped pages, no read() copies
+        ) as reader:
+            for chunk in reader:
+                raw_count += len(chunk)
+                chunks.append(_validate_chunk(chunk))
+    if chunks:
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = _validate_chunk(pd.DataFrame(columns=list(REQUIRED_COLUMNS)))
+    skipped_count = raw_count - len(df)
+
+    # Downcast to compact typed columns now that everything is validated
+    df[COL_HOUR] = df[COL_HOUR].astype("int8")
+    df[COL_DELAY_MINUTES] = df[COL_DELAY_MINUTES].astype("float32")
+    df[COL_STOP_NAME] = df[COL_STOP_NAME].astype("category")
+    df[COL_ROUTE] = df[COL_ROUTE].astype("category")
+    # bus_id repeats across rows too; dictionary-encoding it is the columnar
+    # equivalent of sys.intern — one shared str object per distinct value
+    df[COL_BUS_ID] = df[COL_BUS_ID].astype("category")
+
+    # Derived columns: seconds-of-day for vectorized time-of-day comparisons,
+    # and the original arrival string so responses need no per-request strftime.
+    # Normalize to second resolution before taking epoch integers: to_datetime
+    # yields ns- or us-resolution values depending on the pandas major version,
+    # so dividing by a hard-coded unit would silently corrupt the column.
+    epoch_seconds = df[COL_SCHEDULED_ARRIVAL].astype("datetime64[s]").astype("int64")
+    df[COL_SCHED_SECONDS] = (epoch_seconds % 86400).astype("int32")
+    # Render each *unique* timestamp once: categorize the datetimes, then
+    # strftime just the category index instead of every row
+    arrival_cat = df[COL_SCHEDULED_ARRIVAL].astype("category")
+    df[COL_SCHED_STR] = arrival_cat.cat.rename_categories(
+        arrival_cat.cat.categories.strftime("%Y-%m-%d %H:%M:%S")
+    )
+    return df, skipped_count
+
+
 def load_bus_data():
-    """Loads and preprocesses bus data from the CSV file."""
-    global BUS_DATA, data_load_error, UNIQUE_STOP_NAMES
-    BUS_DATA = []
-    UNIQUE_STOP_NAMES = [] # Clear cache on reload
+    """Loads and preprocesses bus data from the CSV file using vectorized pandas parsing."""
+    global DATA_LOADED, data_load_error, UNIQUE_STOP_NAMES, UNIQUE_ROUTES, UNIQUE_HOURS, \
+        STOP_ROUTE_INDEX, SCHED_DELAY_MEAN, ROUTE_HOUR_STATS, \
+        STOP_CODES, DELAYS, UNIQUE_SCHED_SECONDS, STOP_CATEGORIES, ROUTE_CATEGORIES, \
+        CHART_BYTES, CHART_ETAG, STOP_NAMES_BYTES, STOP_NAMES_ETAG, \
+        FILTER_OPTS_BYTES, FILTER_OPTS_ETAG, \
+        CHART_HEADERS, STOP_NAMES_HEADERS, FILTER_OPTS_HEADERS
+    DATA_LOADED = False
+    STOP_CODES = np.empty(0, dtype=np.int32)
+    DELAYS = np.empty(0, dtype=np.float32)
+    UNIQUE_SCHED_SECONDS = np.empty(0, dtype=np.int32)
+    STOP_CATEGORIES = []
+    ROUTE_CATEGORIES = []
+    UNIQUE_STOP_NAMES = [] # Clear caches on reload
+    UNIQUE_ROUTES = []
+    UNIQUE_HOURS = []
+    CHART_BYTES = b""
+    CHART_ETAG = ""
+    STOP_ROUTE_INDEX = {}
+    SCHED_DELAY_MEAN = {}
+    ROUTE_HOUR_STATS = {}
     data_load_error = None
-    processed_count = 0
-    skipped_count = 0
-    stop_name_set = set() # Use a set for efficient uniqueness check
+
+    # Invalidate memoized per-request responses computed from a previous dataset
+    _compute_stop_schedule.cache_clear()
+    _compute_find_arrival.cache_clear()
 
     try:
+        t0 = time.perf_counter()
         logger.info(f"Attempting to load bus data from: {CSV_FILE_PATH}")
         if not CSV_FILE_PATH.is_file():
             raise FileNotFoundError(f"CSV file not found at {CSV_FILE_PATH}")
 
-        # Define all columns expected in the CSV
-        required_columns = {
-            COL_STOP_NAME, COL_BUS_ID, COL_ROUTE,
-            COL_DELAY_MINUTES, COL_HOUR, COL_SCHEDULED_ARRIVAL,
-            COL_PREDICTION_ERROR
+        # Prefer the preprocessed Parquet sidecar when it is at least as new as
+        # the CSV: columnar + typed, so it loads without any re-validation.
+        df = None
+        skipped_count = 0
+        if (
+            PARQUET_SIDECAR_PATH.is_file()
+            and PARQUET_SIDECAR_PATH.stat().st_mtime >= CSV_FILE_PATH.stat().st_mtime
+        ):
+            try:
+                # memory_map lets pyarrow page the file in via the OS cache
+                # instead of buffered reads, so warm restarts barely touch disk
+                df = pd.read_parquet(PARQUET_SIDECAR_PATH, memory_map=True)
+                logger.info(f"Loaded preprocessed data from sidecar: {PARQUET_SIDECAR_PATH}")
+            except Exception as e:
+                logger.warning(f"Could not read parquet sidecar ({e}); falling back to CSV parse.")
+                df = None
+
+        if df is None:
+            df, skipped_count = _parse_and_validate_csv()
+            # Best-effort sidecar write; a read-only data dir shouldn't break loading
+            try:
+                df.to_parquet(PARQUET_SIDECAR_PATH, compression="zstd", index=False)
+                logger.info(f"Wrote preprocessed sidecar to: {PARQUET_SIDECAR_PATH}")
+            except Exception as e:
+                logger.warning(f"Could not write parquet sidecar: {e}")
+
+        processed_count = len(df)
+
+        # SoA extraction: parallel typed arrays plus the categorical codebooks.
+        # Consumers (including prediction.py) read these instead of row dicts.
+        STOP_CODES = df[COL_STOP_NAME].cat.codes.to_numpy(dtype=np.int32)
+        DELAYS = df[COL_DELAY_MINUTES].to_numpy(dtype=np.float32)
+        # unique() also sorts, so this is directly binary-searchable; the
+        # distinct schedule times are a tiny fraction of the row count
+        UNIQUE_SCHED_SECONDS = np.unique(df[COL_SCHED_SECONDS].to_numpy(dtype=np.int32))
+        STOP_CATEGORIES = df[COL_STOP_NAME].cat.categories.tolist()
+        ROUTE_CATEGORIES = df[COL_ROUTE].cat.categories.tolist()
+
+        # The categorical codebooks are already unique and lexicographically
+        # sorted, so the dropdown lists are the codebooks themselves
+        UNIQUE_STOP_NAMES = STOP_CATEGORIES
+        UNIQUE_ROUTES = ROUTE_CATEGORIES
+        UNIQUE_HOURS = sorted(int(h) for h in df[COL_HOUR].unique())
+
+        # Serialize the constant dropdown payloads once; the ETags let clients
+        # and proxies revalidate with a 304 instead of re-downloading.
+        STOP_NAMES_BYTES = orjson.dumps({"stop_names": UNIQUE_STOP_NAMES})
+        STOP_NAMES_ETAG = f'"{hashlib.blake2b(STOP_NAMES_BYTES, digest_size=8).hexdigest()}"'
+        FILTER_OPTS_BYTES = orjson.dumps({"routes": UNIQUE_ROUTES, "hours": UNIQUE_HOURS})
+        FILTER_OPTS_ETAG = f'"{hashlib.blake2b(FILTER_OPTS_BYTES, digest_size=8).hexdigest()}"'
+        STOP_NAMES_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": STOP_NAMES_ETAG}
+        FILTER_OPTS_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": FILTER_OPTS_ETAG}
+
+        # --- Precompute chart aggregates (the data is immutable after load) ---
+        # One bincount pass over the int32 stop codes yields per-stop delay sums
+        # and counts straight from the SoA arrays — no groupby, no row
+        # iteration, and no per-stop accumulator dicts to allocate.
+        n_stops = len(STOP_CATEGORIES)
+        # bincount accumulates its weights in float64 internally, so the fp32
+        # delay column can be passed straight through without an explicit upcast
+        sums = np.bincount(STOP_CODES, weights=DELAYS, minlength=n_stops)
+        counts = np.bincount(STOP_CODES, minlength=n_stops)
+
+        # Pandas keeps categories lexicographically sorted, so masking the
+        # codebook in order yields the alphabetical payload directly, and the
+        # divide/round run as whole-array NumPy ops instead of a Python loop.
+        present = counts > 0
+        avg_delays = np.round(sums[present] / counts[present], 2)
+        # compress() filters the codebook lazily instead of round-tripping the
+        # names through an object-dtype ndarray just to apply the mask
+        stop_names = list(compress(STOP_CATEGORIES, present))
+        # Serialize the chart payload once too; it is fixed until the next load
+        CHART_BYTES = orjson.dumps({
+            "stop_names": stop_names,
+            "avg_delays": avg_delays.tolist(),
+        })
+        CHART_ETAG = f'"{hashlib.blake2b(CHART_BYTES, digest_size=8).hexdigest()}"'
+        CHART_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": CHART_ETAG}
+        logger.info(f"Precomputed chart aggregates for {int(present.sum())} stops.")
+
+        # --- Precompute per-(stop, route) sorted arrival index ---
+        # Sorting each group by seconds-of-day (ties broken by full datetime) lets
+        # /stop-schedule find the next arrival with np.searchsorted instead of
+        # rescanning and sorting the stop's records on every request.
+        # One pass over the whole frame replaces the per-group re-grouping the
+        # old code did: mean scheduled delay per exact (stop, route, arrival).
+        # Group labels come from the categorical codebooks, so the keys are
+        # already plain (shared) strings — no per-key conversion needed
+        SCHED_DELAY_MEAN = {
+            (stop, route, arrival): round(float(mean), 2)
+            for (stop, route, arrival), mean in df.groupby(
+                [COL_STOP_NAME, COL_ROUTE, COL_SCHED_STR], observed=True
+            )[COL_DELAY_MINUTES].mean().items()
+        }
+
+        # One global sort by (stop, route, seconds-of-day, datetime) leaves
+        # every group internally ordered, replacing the per-group lexsort and
+        # gather passes. Categories sort lexicographically, so grouping the
+        # sorted frame with sort=False still walks (stop, route) pairs
+        # alphabetically and each stop's inner dict is built pre-alphabetized.
+        sorted_df = df.sort_values(
+            [COL_STOP_NAME, COL_ROUTE, COL_SCHED_SECONDS, COL_SCHEDULED_ARRIVAL]
+        )
+        for (stop, route), grp in sorted_df.groupby(
+            [COL_STOP_NAME, COL_ROUTE], observed=True, sort=False
+        ):
+            STOP_ROUTE_INDEX.setdefault(stop, {})[route] = RouteArrivals(
+                seconds=grp[COL_SCHED_SECONDS].to_numpy(),
+                bus_ids=grp[COL_BUS_ID].to_numpy(),
+                arrivals=grp[COL_SCHED_STR].to_numpy(),
+            )
+        logger.info(f"Precomputed arrival indexes for {len(STOP_ROUTE_INDEX)} stops.")
+
+        # --- Precompute per-(route, hour) aggregates for /find-arrival ---
+        # One groupby at load time turns the endpoint into a dict lookup.
+        route_hour_agg = df.groupby([COL_ROUTE, COL_HOUR], observed=True).agg(
+            mean_delay=(COL_DELAY_MINUTES, "mean"),
+            first_sched=(COL_SCHEDULED_ARRIVAL, "min"),
+        )
+        # zip over the columns (with one vectorized strftime) instead of
+        # iterrows(), which materializes a Series per group
+        first_strs = route_hour_agg["first_sched"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        ROUTE_HOUR_STATS = {
+            (route, int(hr)): (round(float(mean_delay), 2), first_str)
+            for (route, hr), mean_delay, first_str in zip(
+                route_hour_agg.index, route_hour_agg["mean_delay"], first_strs
+            )
         }
-        # Add any other columns from your CSV header list if needed for other endpoints
-
-        with open(CSV_FILE_PATH, mode="r", encoding="utf-8-sig") as csvfile:
-            reader = csv.DictReader(csvfile)
-            if not reader.fieldnames:
-                 raise ValueError("CSV file appears to be empty or has no header row.")
-            # Check if ALL required columns are present
-            if not required_columns.issubset(reader.fieldnames):
-                missing = required_columns - set(reader.fieldnames)
-                available = list(reader.fieldnames)
-                raise ValueError(
-                    f"Missing required columns: {missing}. Available columns: {available}"
-                )
-
-            for i, row in enumerate(reader):
-                line_num = i + 2 # For potential error reporting
-                try:
-                    # Extract required fields, handling potential missing keys gracefully
-                    stop_name = row.get(COL_STOP_NAME, "").strip()
-                    bus_id = row.get(COL_BUS_ID, "").strip()
-                    route = row.get(COL_ROUTE, "").strip()
-                    hour_str = row.get(COL_HOUR)
-                    delay_str = row.get(COL_DELAY_MINUTES)
-                    scheduled_arrival_str = row.get(COL_SCHEDULED_ARRIVAL)
-                    prediction_error_str = row.get(COL_PREDICTION_ERROR) # Keep loading if needed elsewhere
-
-                    # --- Start Basic Validation ---
-                    if not all([stop_name, bus_id, route, scheduled_arrival_str]):
-                        # logger.debug(f"Skipping row {line_num}: Missing essential string data.")
-                        skipped_count += 1; continue
-                    if hour_str is None or delay_str is None or prediction_error_str is None:
-                        # logger.debug(f"Skipping row {line_num}: Missing numeric/time string data.")
-                         skipped_count += 1; continue
-                    # --- End Basic Validation ---
-
-                    # --- Start Conversion and Detailed Validation ---
-                    try:
-                        hour = int(hour_str)
-                        delay_minutes = float(delay_str)
-                        prediction_error_minutes = float(prediction_error_str) # Keep converting if needed
-
-                        if not (0 <= hour <= 23):
-                            # logger.debug(f"Skipping row {line_num}: Invalid hour value '{hour_str}'.")
-                            skipped_count += 1; continue
-                        if not math.isfinite(delay_minutes):
-                            # logger.debug(f"Skipping row {line_num}: Non-finite delay value '{delay_str}'.")
-                            skipped_count += 1; continue
-                        if not math.isfinite(prediction_error_minutes): # Keep validating if needed
-                            # logger.debug(f"Skipping row {line_num}: Non-finite prediction error value '{prediction_error_str}'.")
-                            skipped_count += 1; continue
-
-                        if len(scheduled_arrival_str) < 16: # Basic check for 'YYYY-MM-DD HH:MM'
-                             # logger.debug(f"Skipping row {line_num}: Invalid scheduled arrival format '{scheduled_arrival_str}'.")
-                             skipped_count += 1; continue
-                        datetime.strptime(scheduled_arrival_str, '%Y-%m-%d %H:%M:%S')
-
-                    except (ValueError, TypeError) as conv_err:
-                        # logger.debug(f"Skipping row {line_num}: Conversion error - {conv_err}. Values: hour='{hour_str}', delay='{delay_str}', arrival='{scheduled_arrival_str}'.")
-                        skipped_count += 1; continue
-                    # --- End Conversion and Detailed Validation ---
-
-                    processed_row = {
-                        COL_STOP_NAME: stop_name,
-                        COL_BUS_ID: bus_id,
-                        COL_ROUTE: route,
-                        COL_HOUR: hour,
-                        COL_DELAY_MINUTES: delay_minutes,
-                        COL_SCHEDULED_ARRIVAL: scheduled_arrival_str,
-                        COL_PREDICTION_ERROR: prediction_error_minutes # Include if needed elsewhere
-                    }
-                    BUS_DATA.append(processed_row)
-                    stop_name_set.add(stop_name) # Add valid stop name to set
-                    processed_count += 1
-
-                except Exception as inner_e: # Catch unexpected errors within the loop for a specific row
-                    logger.warning(f"Skipping row {line_num} due to unexpected error: {inner_e}")
-                    skipped_count += 1; continue
-
-        UNIQUE_STOP_NAMES = sorted(list(stop_name_set))
         logger.info(
-            f"Successfully processed {processed_count} records. Skipped {skipped_count} rows due to validation/errors. Found {len(UNIQUE_STOP_NAMES)} unique stop names."
+            f"Precomputed (route, hour) aggregates for {len(ROUTE_HOUR_STATS)} pairs; "
+            f"{UNIQUE_SCHED_SECONDS.size} distinct schedule times in the search index."
+        )
+
+        # Everything the endpoints serve from is built; the parsed frame
+        # itself goes out of scope here instead of being kept as a duplicate
+        # row store, roughly halving resident memory per worker.
+        DATA_LOADED = True
+        logger.info(
+            f"Successfully processed {processed_count} records in {time.perf_counter() - t0:.2f}s. Skipped {skipped_count} rows due to validation/errors. Found {len(UNIQUE_STOP_NAMES)} unique stop names."
         )
         if processed_count == 0 and skipped_count > 0:
              data_load_error = "CSV contains rows, but none could be processed successfully due to data format or validation issues."
@@ -185,73 +499,187 @@ def load_bus_data():
 
     except FileNotFoundError as e:
         data_load_error = f"Error loading data: {e}"; logger.error(data_load_error)
-    except ValueError as e: # Catches header issues or empty file from DictReader checks
+    except ValueError as e: # Catches header issues or empty/malformed file from pandas
         data_load_error = f"CSV format or data error: {e}"; logger.error(data_load_error)
     except Exception as e: # Catch broader exceptions during file open or initial read
         data_load_error = f"An unexpected error occurred during data loading: {e}"; logger.exception(data_load_error)
 
 
-# --- Load data when the module is imported ---
-load_bus_data()
+def ensure_loaded():
+    """Runs load_bus_data() exactly once, double-checked under a lock.
+
+    Importing the module no longer triggers a parse, so test runners and
+    tooling that merely import the app don't pay for it; the FastAPI startup
+    hook (and, defensively, check_data_loaded) load on first need instead.
+    """
+    if DATA_LOADED or data_load_error is not None:
+        return
+    with _LOAD_LOCK:
+        if not DATA_LOADED and data_load_error is None:
+            load_bus_data()
+
 
 # --- API Router ---
-router = APIRouter(prefix="/api", tags=["Bus Data"])
+# default_response_class covers any future handler that returns a plain dict;
+# the current ones all hand back prebuilt Response objects anyway
+router = APIRouter(prefix="/api", tags=["Bus Data"], default_response_class=ORJSONResponse)
+
+
+@router.on_event("startup")
+def _load_on_startup():
+    """Warms the dataset before the server starts accepting requests."""
+    ensure_loaded()
 
 # --- Helper Function to Check Data Loading Status ---
 def check_data_loaded():
     """Raises HTTPException if data failed to load or is unavailable."""
+    # Steady-state fast path: once the load succeeded with data present,
+    # nothing below can change until a restart, so every request after the
+    # first costs two global reads and no function call.
+    if DATA_LOADED and STOP_CODES.size:
+        return
+    ensure_loaded()
     if data_load_error:
         logger.error(f"Data loading check failed: {data_load_error}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: Could not load bus data. Reason: {data_load_error}")
-    if not BUS_DATA:
-        logger.warning("Data check: BUS_DATA list is empty.")
+    if not DATA_LOADED or STOP_CODES.size == 0:
+        logger.warning("Data check: no bus records are loaded.")
         raise HTTPException(status_code=503, detail="Service Unavailable: No bus data has been loaded.")
 
 # --- API Endpoints ---
+# Handlers are async def on purpose: each one returns cached/memoized bytes in
+# microseconds, so running them inline on the event loop beats paying the
+# threadpool round-trip that sync def handlers incur per request.
 
 # Endpoint: Average Scheduled Delay per STOP NAME
 @router.get("/bus-data", response_model=StopDelayChartDataResponse)
-async def get_stop_delay_data_for_chart():
+async def get_stop_delay_data_for_chart(request: Request):
     """
     Calculates the average scheduled delay for each unique bus **stop** across all data.
     Used to populate an overview chart showing average delays per stop.
     """
     check_data_loaded()
-    stop_stats = defaultdict(lambda: {"sum_delay": 0.0, "count": 0})
+    # Aggregates are precomputed AND pre-serialized in load_bus_data(); the hot
+    # path hands back the cached bytes, same as /stop-names
+    if request.headers.get("if-none-match") == CHART_ETAG:
+        # RFC 9110: 304s should carry the same validator/caching headers
+        return Response(status_code=304, headers=CHART_HEADERS)
+    return Response(
+        content=CHART_BYTES, media_type="application/json", headers=CHART_HEADERS
+    )
 
-    for record in BUS_DATA:
-        stop_name = record.get(COL_STOP_NAME)
-        delay_minutes = record.get(COL_DELAY_MINUTES)
+# Endpoint for populating stop name filter dropdown
+@router.get("/stop-names", response_model=StopNamesResponse)
+async def get_stop_names(request: Request):
+    """ Provides a sorted list of unique stop names found in the data. """
+    check_data_loaded()
+    # Constant payload: serialized once at load; 304 when the client already has it
+    if request.headers.get("if-none-match") == STOP_NAMES_ETAG:
+        return Response(status_code=304, headers=STOP_NAMES_HEADERS)
+    return Response(
+        content=STOP_NAMES_BYTES, media_type="application/json", headers=STOP_NAMES_HEADERS
+    )
 
-        if stop_name and isinstance(delay_minutes, float) and math.isfinite(delay_minutes):
-            stop_stats[stop_name]["sum_delay"] += delay_minutes
-            stop_stats[stop_name]["count"] += 1
+# Endpoint for populating route/hour filter dropdowns
+@router.get("/filter-options", response_model=FilterOptionsResponse)
+async def get_filter_options(request: Request):
+    """ Provides sorted lists of unique routes and hours found in the data. """
+    check_data_loaded()
+    # Same cached-bytes treatment as /stop-names
+    if request.headers.get("if-none-match") == FILTER_OPTS_ETAG:
+        return Response(status_code=304, headers=FILTER_OPTS_HEADERS)
+    return Response(
+        content=FILTER_OPTS_BYTES, media_type="application/json", headers=FILTER_OPTS_HEADERS
+    )
 
-    chart_output = {"stop_names": [], "avg_delays": []}
-    sorted_stop_names = sorted(stop_stats.keys())
+# Memoized compute core for /find-arrival: the data never changes between loads,
+# so identical queries can reuse the already-serialized JSON bytes.
+@lru_cache(maxsize=4096)
+def _compute_find_arrival(route: str, hour: int) -> bytes:
+    stats = ROUTE_HOUR_STATS.get((route, hour))
+    if stats is None:
+        # The codebook distinguishes a route we have never seen from a known
+        # route with no records during this hour; only the error path pays
+        # for the membership scan.
+        if route in ROUTE_CATEGORIES:
+            detail = f"No data found for route '{route}' at hour {hour}."
+        else:
+            detail = f"Unknown route '{route}'."
+        logger.warning(detail)
+        raise HTTPException(status_code=404, detail=detail)
+    avg_delay, first_arrival = stats
+    return orjson.dumps({
+        "route": route,
+        "hour": hour,
+        "average_delay_minutes": avg_delay,
+        "first_scheduled_arrival": first_arrival,
+    })
+
+# Endpoint: average delay for a (route, hour) pair, served from the precomputed
+# index. There is deliberately no per-request scan left here, vectorized or
+# otherwise: the load-time groupby collapsed the rows into ROUTE_HOUR_STATS,
+# so lookup cost no longer depends on the dataset size at all.
+@router.get("/find-arrival", response_model=FindArrivalResponse)
+async def find_average_delay_for_route_hour(
+    route: str = Query(..., min_length=1, description="The exact bus route identifier (published_line)."),
+    hour: int = Query(..., ge=0, le=23, description="Requested hour (0-23).")
+):
+    """
+    Returns the average scheduled delay and the earliest scheduled arrival for
+    a given route and hour. Served from ROUTE_HOUR_STATS, which is precomputed
+    once at load time, so each request is a single dict lookup.
+    """
+    check_data_loaded()
+    return Response(content=_compute_find_arrival(route, hour), media_type="application/json")
+
+# Memoized compute core for /stop-schedule, keyed by the query params. The index
+# is immutable between loads, so repeated queries reuse pre-serialized bytes.
+# Sized for real dropdown traffic: a few thousand stops times the handful of
+# times-of-day users actually query
+@lru_cache(maxsize=8192)
+def _compute_stop_schedule(stop_name: str, hour: int, minute: int) -> bytes:
+    # O(1) lookup into the index built at load time
+    stop_routes = STOP_ROUTE_INDEX.get(stop_name)
+    if not stop_routes:
+        logger.warning(f"No data found for stop name: '{stop_name}'")
+        raise HTTPException(status_code=404, detail=f"No data found for stop name: '{stop_name}'")
 
-    for stop in sorted_stop_names:
-        stats = stop_stats[stop]
-        if stats["count"] > 0:
-            average_delay = stats["sum_delay"] / stats["count"]
-            chart_output["stop_names"].append(stop)
-            chart_output["avg_delays"].append(round(average_delay, 2))
+    results_for_routes: List[Dict[str, Any]] = []
+    target_seconds = hour * 3600 + minute * 60 # The time the user is interested in
+    sched_delay_mean = SCHED_DELAY_MEAN # local bind: skip a global lookup per route
 
-    if not chart_output["stop_names"]:
-        logger.warning("No valid stop data with delays found to generate chart output.")
+    # Process each route serving this stop
+    for route, index_entry in stop_routes.items():
+        next_bus_id: Optional[str] = None
+        next_arrival_str: Optional[str] = None
+        avg_scheduled_delay: Optional[float] = None
 
-    logger.info(f"Generated average delay data for {len(chart_output['stop_names'])} stops.")
-    return chart_output
+        # Binary search over the pre-sorted seconds-of-day array: O(log n) per route
+        pos = int(index_entry.seconds.searchsorted(target_seconds, side="left"))
+        if pos < index_entry.seconds.size:
+            next_bus_id = str(index_entry.bus_ids[pos])
+            next_arrival_str = str(index_entry.arrivals[pos])
+            # Average scheduled delay for this exact arrival was precomputed at load
+            avg_scheduled_delay = sched_delay_mean.get((stop_name, route, next_arrival_str))
+            if avg_scheduled_delay is None:
+                logger.warning(f"Found next bus for {route} @ {next_arrival_str}, but no valid scheduled delays found matching this exact time to average.")
 
-# Endpoint for populating stop name filter dropdown
-@router.get("/stop-names", response_model=StopNamesResponse)
-async def get_stop_names():
-    """ Provides a sorted list of unique stop names found in the data. """
-    check_data_loaded()
-    if not UNIQUE_STOP_NAMES:
-         logger.warning("Stop names requested, but the UNIQUE_STOP_NAMES list is empty.")
-         return {"stop_names": []}
-    return {"stop_names": UNIQUE_STOP_NAMES}
+        # --- Prepare result for this route ---
+        results_for_routes.append({
+            "route": route,
+            "average_scheduled_delay_at_schedule": avg_scheduled_delay,
+            "next_bus_id": next_bus_id,
+            "next_scheduled_arrival": next_arrival_str,
+        })
+
+    # Routes were stored alphabetically at load, so the list is already in
+    # the consistent order the frontend expects
+    logger.info(f"Returning schedule info for {len(results_for_routes)} routes at stop '{stop_name}'.")
+    return orjson.dumps({
+        "stop_name": stop_name,
+        "requested_time": f"{hour:02d}:{minute:02d}",
+        "routes_at_stop": results_for_routes,
+    })
 
 # Endpoint for the filter page (calculates avg SCHEDULED DELAY for next arrival)
 # Endpoint for the filter page (REVISED LOGIC)
@@ -269,95 +697,6 @@ async def get_schedule_for_stop(
     """
     check_data_loaded()
     logger.info(f"Request received for stop: '{stop_name}', time: {hour:02d}:{minute:02d}")
-
-    # Filter data for the specific stop first for efficiency
-    stop_specific_data = [rec for rec in BUS_DATA if rec.get(COL_STOP_NAME) == stop_name]
-    if not stop_specific_data:
-        logger.warning(f"No data found for stop name: '{stop_name}'")
-        raise HTTPException(status_code=404, detail=f"No data found for stop name: '{stop_name}'")
-
-    # Group remaining data by route
-    routes_data = defaultdict(list)
-    for record in stop_specific_data:
-        route = record.get(COL_ROUTE)
-        if route: routes_data[route].append(record) # Store the whole record
-
-    if not routes_data:
-         logger.warning(f"Data found for stop '{stop_name}', but no valid routes associated.")
-         return StopScheduleResponse(stop_name=stop_name, requested_time=f"{hour:02d}:{minute:02d}", routes_at_stop=[])
-
-    results_for_routes: List[StopRouteScheduleInfo] = []
-    user_time_obj = time(hour, minute) # The time the user is interested in
-
-    # Process each route serving this stop
-    for route, all_records_for_route in routes_data.items():
-        # logger.debug(f"Processing route: {route} for stop '{stop_name}'")
-
-        potential_next_arrivals = []
-        # 1. Parse datetimes and filter by user's requested TIME
-        for record in all_records_for_route:
-            scheduled_arrival_str = record.get(COL_SCHEDULED_ARRIVAL)
-            if not scheduled_arrival_str: continue
-            try:
-                scheduled_dt = datetime.strptime(scheduled_arrival_str, '%Y-%m-%d %H:%M:%S')
-                # Keep only records where the TIME part is >= user's requested time
-                if scheduled_dt.time() >= user_time_obj:
-                    potential_next_arrivals.append((scheduled_dt, record)) # Store tuple (datetime, record_dict)
-            except (ValueError, TypeError):
-                # logger.debug(f"Could not parse datetime for record on route {route}: {scheduled_arrival_str}")
-                continue # Skip records with invalid datetime format
-
-        # 2. Sort the filtered list by FULL DATETIME to find the earliest one
-        potential_next_arrivals.sort(key=lambda item: item[0])
-
-        # 3. Select the first one as the next bus (if any exist)
-        next_bus_record: Optional[Dict] = None
-        if potential_next_arrivals:
-            # The first item in the sorted list is the next arrival at/after the requested time
-            _ , next_bus_record = potential_next_arrivals[0]
-            # logger.debug(f"Next bus found for route {route}: ID {next_bus_record.get(COL_BUS_ID)} scheduled at {next_bus_record.get(COL_SCHEDULED_ARRIVAL)}")
-        else:
-            # logger.debug(f"No scheduled arrivals found for route {route} at or after {user_time_obj.strftime('%H:%M')}")
-            pass # next_bus_record remains None
-
-        # 4. Calculate Average SCHEDULED DELAY for the Found Schedule Time
-        avg_scheduled_delay: Optional[float] = None
-        if next_bus_record:
-            # Get the exact scheduled arrival string of the *found* next bus
-            target_schedule_str = next_bus_record.get(COL_SCHEDULED_ARRIVAL)
-            total_scheduled_delay = 0.0
-            delay_count = 0
-
-            # Iterate through ALL records for this route/stop again to find matches for the *exact* schedule time string
-            # This averages delays for all observations of a bus scheduled at this specific time (e.g., same scheduled run on different days)
-            for record in all_records_for_route: # Use the already filtered list for this route/stop
-                if record.get(COL_SCHEDULED_ARRIVAL) == target_schedule_str:
-                    scheduled_delay = record.get(COL_DELAY_MINUTES)
-                    if isinstance(scheduled_delay, float) and math.isfinite(scheduled_delay):
-                        total_scheduled_delay += scheduled_delay
-                        delay_count += 1
-                    # else: logger.debug(f"Record matching schedule {target_schedule_str} for route {route} has invalid delay: {scheduled_delay}")
-
-            if delay_count > 0:
-                avg_scheduled_delay = round(total_scheduled_delay / delay_count, 2)
-                # logger.debug(f"Avg scheduled delay for {route} @ {target_schedule_str}: {avg_scheduled_delay} ({delay_count} records)")
-            else:
-                 # This case might happen if the 'next_bus_record' itself had an invalid delay value, or no other records matched exactly
-                 logger.warning(f"Found next bus for {route} @ {target_schedule_str}, but no valid scheduled delays found matching this exact time to average.")
-        # else: # No next bus was found, avg_scheduled_delay remains None
-            # logger.debug(f"No next bus found for route {route}, cannot calculate scheduled delay.")
-
-        # --- Prepare result for this route ---
-        results_for_routes.append(StopRouteScheduleInfo(
-            route=route,
-            average_scheduled_delay_at_schedule=avg_scheduled_delay, # Use the calculated average
-            next_bus_id=next_bus_record.get(COL_BUS_ID) if next_bus_record else None,
-            next_scheduled_arrival=next_bus_record.get(COL_SCHEDULED_ARRIVAL) if next_bus_record else None,
-        ))
-
-    # Sort the final list of routes alphabetically for consistent frontend display
-    results_for_routes.sort(key=lambda r: r.route)
-    logger.info(f"Returning schedule info for {len(results_for_routes)} routes at stop '{stop_name}'.")
-    return StopScheduleResponse(stop_name=stop_name, requested_time=f"{hour:02d}:{minute:02d}", routes_at_stop=results_for_routes)
+    return Response(content=_compute_stop_schedule(stop_name, hour, minute), media_type="application/json")
 
 # --- (End of file) ---
\ No newline at end of file
@@ -1,13 +1,16 @@
 # backend/app/routers/prediction.py
 
 import pickle
+import re
+import threading
 import numpy as np
 import logging
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime, time
-from typing import Optional, Tuple # Added Tuple
+from typing import List, Optional, Tuple # Added Tuple
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from statsmodels.nonparametric.smoothers_lowess import lowess # Ensure lowess is available
 
@@ -15,6 +18,11 @@ from statsmodels.nonparametric.smoothers_lowess import lowess # Ensure lowess is
 CURRENT_DIR = Path(__file__).parent
 BACKEND_DIR = CURRENT_DIR.parent.parent
 MODEL_FILE_PATH = BACKEND_DIR / "data" / "bus_delay_model.pkl" # Path to your model
+# Raw .npy sidecars for the curve, written after the first unpickle; np.load
+# with mmap_mode shares the pages across all workers via the OS page cache
+# instead of each process allocating its own copy of the arrays.
+MODEL_XS_PATH = MODEL_FILE_PATH.with_suffix(".xs.npy")
+MODEL_YS_PATH = MODEL_FILE_PATH.with_suffix(".ys.npy")
 
 # --- Setup Logging ---
 logging.basicConfig(
@@ -27,25 +35,40 @@ logger = logging.getLogger(__name__)
 # Be mindful of potential circular imports if prediction.py imports bus_data
 # and bus_data.py were to import prediction.py (which it doesn't here).
 try:
-    # Import the actual list, the column name constant, and the check function
-    from .bus_data import BUS_DATA, COL_SCHEDULED_ARRIVAL, check_data_loaded as check_bus_data_loaded
-    logger.info("Successfully imported BUS_DATA and COL_SCHEDULED_ARRIVAL from .bus_data")
+    # Import the module itself (its UNIQUE_SCHED_SECONDS array is reassigned
+    # on reload, so attribute access must happen at call time), plus the check
+    from . import bus_data
+    from .bus_data import check_data_loaded as check_bus_data_loaded
+    logger.info("Successfully imported bus_data module (SoA schedule arrays)")
 except ImportError as e:
     # Fallback if running script directly or structure changes
     logger.error(f"Could not import from .bus_data: {e}. Schedule lookup will fail.")
-    BUS_DATA = [] # Define as empty list to prevent NameError later
-    COL_SCHEDULED_ARRIVAL = "scheduled_arrival" # Default fallback name
+    bus_data = None # Sentinel so lookups fail gracefully
     # Define a dummy check function if import fails
     def check_bus_data_loaded():
-         if not BUS_DATA:
-             logger.error("Bus data check failed: BUS_DATA is empty (import failed).")
-             raise HTTPException(status_code=503, detail="Historical bus data is unavailable due to import error.")
+         logger.error("Bus data check failed: bus_data module unavailable (import failed).")
+         raise HTTPException(status_code=503, detail="Historical bus data is unavailable due to import error.")
 
 # --- Model Storage ---
-MODEL_DATA: Optional[dict] = None
+# Uniform-grid lookup table: the curve pre-evaluated every LUT_STEP minutes
+# across the whole day, so a prediction is two reads + a blend, no bisect.
+# This is the readiness signal (non-None means the model is usable) and the
+# only model state held after load; the raw curve is released once the table
+# is built.
+LUT_STEP = 0.25 # minutes; ~23 KB of float32 for the full day
+MODEL_LUT: Optional[np.ndarray] = None
 model_load_error: Optional[str] = None
+_MODEL_LOCK = threading.Lock() # guards the one-time load under concurrent callers
+
+# Single source of truth for the HH:MM:SS rule: compiled once here for batch
+# entries, and its .pattern feeds the single endpoint's query validation
+_HMS_PATTERN = re.compile(r"^([01]\d|2[0-3]):([0-5]\d):([0-5]\d)$")
+# Generous ceiling: one query per minute of the day
+MAX_BATCH_TIMES = 1440
 
 # --- Pydantic Models ---
+# Feeds the OpenAPI schema only; the endpoint returns ORJSONResponse dicts
+# directly, skipping per-request model construction and re-validation.
 class NextPredictionResponse(BaseModel): # Renamed for clarity
     requested_time: str = Field(..., description="The time string submitted by the user (HH:MM:SS).")
     next_scheduled_time_used: Optional[str] = Field(
@@ -56,25 +79,77 @@ class NextPredictionResponse(BaseModel): # Renamed for clarity
     )
     message: str = Field(..., description="A message indicating success or the reason for failure/no prediction.")
 
+class BatchPredictionRequest(BaseModel):
+    times: List[str] = Field(
+        ..., description=f"Time strings in HH:MM:SS format (at most {MAX_BATCH_TIMES})."
+    )
+
 # --- Model Loading Function ---
 def load_prediction_model():
     """Loads the pickled prediction model data from disk."""
-    global MODEL_DATA, model_load_error
-    MODEL_DATA = None # Reset on reload
+    global MODEL_LUT, model_load_error
+    MODEL_LUT = None # Reset on reload
     model_load_error = None
     try:
         logger.info(f"Attempting to load prediction model from: {MODEL_FILE_PATH}")
         if not MODEL_FILE_PATH.is_file():
             raise FileNotFoundError(f"Model file not found at {MODEL_FILE_PATH}")
 
-        with open(MODEL_FILE_PATH, 'rb') as f:
-            MODEL_DATA = pickle.load(f)
-
-        # Basic validation of loaded model structure (adjust based on your actual .pkl content)
-        if not isinstance(MODEL_DATA, dict) or 'smoothed_curve' not in MODEL_DATA:
-             raise ValueError("Loaded model data is not in the expected format (missing 'smoothed_curve').")
-        if not isinstance(MODEL_DATA['smoothed_curve'], np.ndarray) or MODEL_DATA['smoothed_curve'].ndim != 2:
-             raise ValueError("Model data 'smoothed_curve' is not a 2D numpy array.")
+        # Prefer the .npy sidecars when they are at least as new as the pickle:
+        # memory-mapped, so every worker shares one physical copy of the curve.
+        pkl_mtime = MODEL_FILE_PATH.stat().st_mtime
+        model_xs = None
+        model_ys = None
+        if (
+            MODEL_XS_PATH.is_file() and MODEL_XS_PATH.stat().st_mtime >= pkl_mtime
+            and MODEL_YS_PATH.is_file() and MODEL_YS_PATH.stat().st_mtime >= pkl_mtime
+        ):
+            try:
+                model_xs = np.load(MODEL_XS_PATH, mmap_mode='r')
+                model_ys = np.load(MODEL_YS_PATH, mmap_mode='r')
+                logger.info("Loaded model curve from memory-mapped .npy sidecars.")
+            except Exception as e:
+                logger.warning(f"Could not read model sidecars ({e}); falling back to pickle.")
+                model_xs = None
+                model_ys = None
+
+        if model_xs is None:
+            with open(MODEL_FILE_PATH, 'rb') as f:
+                model_data = pickle.load(f)
+
+            # Basic validation of loaded model structure (adjust based on your actual .pkl content)
+            if not isinstance(model_data, dict) or 'smoothed_curve' not in model_data:
+                 raise ValueError("Loaded model data is not in the expected format (missing 'smoothed_curve').")
+            if not isinstance(model_data['smoothed_curve'], np.ndarray) or model_data['smoothed_curve'].ndim != 2:
+                 raise ValueError("Model data 'smoothed_curve' is not a 2D numpy array.")
+
+            # Split the curve into contiguous X/Y arrays once; np.interp then
+            # works on cache-friendly 1D input instead of strided column slices.
+            # float32 is ample for delay-in-minutes values displayed to two
+            # decimals, and it halves the sidecar files and load bandwidth
+            smoothed = model_data['smoothed_curve']
+            model_xs = np.ascontiguousarray(smoothed[:, 0], dtype=np.float32)
+            model_ys = np.ascontiguousarray(smoothed[:, 1], dtype=np.float32)
+
+            # Best-effort sidecar write; a read-only data dir shouldn't break loading
+            try:
+                np.save(MODEL_XS_PATH, model_xs)
+                np.save(MODEL_YS_PATH, model_ys)
+                logger.info("Wrote model curve sidecars next to the pickle.")
+            except Exception as e:
+                logger.warning(f"Could not write model sidecars: {e}")
+
+        # Pre-evaluate the curve on a uniform minute grid (endpoint included,
+        # so the last slot of the day still has a right neighbor to blend
+        # with). LOWESS x values are sorted, which np.interp requires. The raw
+        # curve (however long LOWESS made it) goes out of scope here: only
+        # this fixed-size table is kept resident, so model memory no longer
+        # scales with the training data.
+        grid = np.arange(0.0, 1440.0 + LUT_STEP, LUT_STEP)
+        MODEL_LUT = np.interp(grid, model_xs, model_ys).astype(np.float32)
+
+        # The memoized predictions below belong to the previous curve
+        predict_delay_from_model.cache_clear()
 
         logger.info("Prediction model loaded successfully.")
 
@@ -85,118 +160,141 @@ def load_prediction_model():
     except Exception as e:
         model_load_error = f"An unexpected error occurred during model loading: {e}"; logger.exception(model_load_error)
 
-# --- Load model when the module is imported ---
-load_prediction_model()
+def ensure_model_loaded():
+    """Runs load_prediction_model() exactly once, double-checked under a lock.
+
+    Importing the module no longer unpickles anything, mirroring bus_data's
+    lazy load; the startup hook (and, defensively, check_model_loaded) load
+    on first need and prewarm the common queries.
+    """
+    if MODEL_LUT is not None or model_load_error is not None:
+        return
+    with _MODEL_LOCK:
+        if MODEL_LUT is None and model_load_error is None:
+            load_prediction_model()
+            if MODEL_LUT is not None:
+                # Prewarm the memo with the on-the-hour times the frontend
+                # most often asks for
+                for h in range(24):
+                    predict_delay_from_model(h * 3600)
+
 
 # --- API Router ---
-router = APIRouter(prefix="/api", tags=["Prediction"])
+router = APIRouter(prefix="/api", tags=["Prediction"], default_response_class=ORJSONResponse)
+
+
+@router.on_event("startup")
+def _load_model_on_startup():
+    """Warms the model before the server starts accepting requests."""
+    ensure_model_loaded()
 
 # --- Helper Function to Check Model Loading Status ---
 def check_model_loaded():
     """Raises HTTPException if the model failed to load."""
+    # Steady-state fast path mirroring bus_data.check_data_loaded: a loaded
+    # curve can't unload until restart, so skip the error checks entirely.
+    if MODEL_LUT is not None:
+        return
+    ensure_model_loaded()
     if model_load_error:
         logger.error(f"Model loading check failed: {model_load_error}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: Could not load prediction model. Reason: {model_load_error}")
-    if MODEL_DATA is None:
-        logger.warning("Prediction check: MODEL_DATA is None.")
+    if MODEL_LUT is None:
+        logger.warning("Prediction check: model curve not loaded.")
         raise HTTPException(status_code=503, detail="Service Unavailable: Prediction model not loaded.")
 
+# --- Helper: Parse HH:MM:SS by fixed offsets ---
+def _parse_hms(s: str) -> Tuple[int, int, int]:
+    """Splits an HH:MM:SS string into ints; the endpoint regex has already
+    vouched for the format, so no strptime-style re-validation is needed."""
+    return int(s[0:2]), int(s[3:5]), int(s[6:8])
+
+
 # --- Helper: Find Next Scheduled Time ---
-def find_next_scheduled_time(user_time_str: str) -> Optional[time]:
+def find_next_scheduled_time(user_time_str: str) -> Optional[int]:
     """
-    Finds the earliest unique scheduled arrival time from BUS_DATA
-    that occurs at or after the user's requested time.
+    Finds the earliest unique scheduled arrival time (time-of-day) that occurs
+    at or after the user's requested time, via binary search over the sorted
+    unique seconds-of-day array exposed by bus_data.
 
     Args:
         user_time_str: Time string in HH:MM:SS format.
 
     Returns:
-        The next datetime.time object, or None if none found or data error.
+        The next scheduled time as int seconds since midnight (the value stays
+        numeric through the prediction pipeline; callers format it for
+        display), or None if none found or data error.
     """
+    # Boolean readiness probe first: when data is loaded (the steady state)
+    # this is one attribute read with no exception machinery. The raising
+    # check runs only when the flag is down — to kick the lazy first load or
+    # surface the load error — and is caught right here.
+    if bus_data is None or not bus_data.DATA_LOADED:
+        try:
+            check_bus_data_loaded()
+        except HTTPException as e:
+            logger.error(f"Bus data unavailable for finding next schedule: {e.detail}")
+            return None
+
     try:
-        # Use the imported check function for bus data
-        check_bus_data_loaded()
-        user_time = datetime.strptime(user_time_str, '%H:%M:%S').time()
+        h, m, sec = _parse_hms(user_time_str)
     except ValueError: # Catches invalid user time format
         logger.error(f"Invalid user time format provided: {user_time_str}")
         return None
-    except HTTPException as e: # Catches bus data loading issues
-         logger.error(f"Bus data unavailable for finding next schedule: {e.detail}")
-         return None
-
-    potential_next_times = set() # Use set for unique times
 
-    for record in BUS_DATA:
-        # Use the imported constant for the column name
-        scheduled_arrival_str = record.get(COL_SCHEDULED_ARRIVAL)
-        if not scheduled_arrival_str: continue
-        try:
-            # We only care about the TIME part for comparison and finding the *next* time slot
-            scheduled_dt = datetime.strptime(scheduled_arrival_str, '%Y-%m-%d %H:%M:%S')
-            scheduled_time = scheduled_dt.time()
-
-            if scheduled_time >= user_time:
-                potential_next_times.add(scheduled_time)
-        except (ValueError, TypeError):
-            # Log invalid format in historical data if needed, but continue
-            # logger.debug(f"Skipping record with invalid datetime format: {scheduled_arrival_str}")
-            continue
-
-    if not potential_next_times:
-        logger.info(f"No scheduled times found in BUS_DATA at or after {user_time_str}")
+    target_seconds = h * 3600 + m * 60 + sec
+
+    # O(log n) over the precomputed sorted unique array: searchsorted lands on
+    # the first schedule >= the target. bus_data.UNIQUE_SCHED_SECONDS is the
+    # single source of truth for distinct schedule times — dedup and sorting
+    # happened once at load, so this path allocates nothing per request (no
+    # candidate set, no min() scan).
+    sched_seconds = bus_data.UNIQUE_SCHED_SECONDS
+    pos = int(sched_seconds.searchsorted(target_seconds, side='left'))
+    if pos == sched_seconds.size:
+        logger.info(f"No scheduled times found at or after {user_time_str}")
         return None # No schedules found at or after user time
 
-    # Find the minimum (earliest) time from the set
-    next_time = min(potential_next_times)
-    logger.debug(f"Found next potential scheduled time: {next_time.strftime('%H:%M:%S')}")
-    return next_time
+    next_seconds = int(sched_seconds[pos])
+    logger.debug(f"Found next potential scheduled time: {next_seconds}s since midnight")
+    return next_seconds
 
 
 # --- Prediction Logic (Adapted from your script, uses numpy.interp) ---
-def predict_delay_from_model(model_data: dict, target_time_str: str) -> Optional[float]:
+@lru_cache(maxsize=4096)
+def predict_delay_from_model(target_seconds: int) -> Optional[float]:
     """
-    Uses the loaded LOWESS model data to predict delay for a target time.
+    Uses the precomputed lookup table (MODEL_LUT) to predict delay for a
+    target time. Memoized: the table is static between reloads and the
+    input space is small (distinct schedule seconds), so repeats are a dict
+    hit; load_prediction_model clears the cache when the model changes.
 
     Args:
-        model_data: The dictionary loaded from the .pkl file.
-        target_time_str: Time string in 'HH:MM:SS' format.
+        target_seconds: Time of day as int seconds since midnight, straight
+            from the schedule snap — no string round-trip in between.
 
     Returns:
         Predicted delay in minutes, or None if prediction fails.
     """
     try:
-        # Validate structure again just before use
-        if 'smoothed_curve' not in model_data or not isinstance(model_data['smoothed_curve'], np.ndarray):
-             logger.error("Invalid model structure passed to predict_delay_from_model.")
-             return None
-        smoothed = model_data['smoothed_curve']
-
-        # Convert target time to minutes
-        t = datetime.strptime(target_time_str, '%H:%M:%S').time()
-        target_minutes = t.hour * 60 + t.minute + t.second / 60
-
-        # Extract X and Y from the smoothed data
-        # Ensure smoothed_x is sorted (should be from LOWESS)
-        smoothed_x = smoothed[:, 0]
-        smoothed_y = smoothed[:, 1]
-
-        # Use numpy.interp for efficient interpolation (handles edges automatically)
-        predicted_delay = np.interp(target_minutes, smoothed_x, smoothed_y)
-
-        # Optional: Check if target_minutes is outside the range of smoothed_x
-        # if not (smoothed_x.min() <= target_minutes <= smoothed_x.max()):
-        #     logger.warning(f"Target time {target_minutes:.2f} min is outside the model's trained range ({smoothed_x.min():.2f}-{smoothed_x.max():.2f}). Prediction might be less reliable.")
-
-        return float(predicted_delay) # Ensure it's a standard float
-
-    except ValueError as e: # Catch errors like invalid time format
-        logger.error(f"ValueError during prediction calculation for time '{target_time_str}': {e}")
-        return None
-    except IndexError as e: # Catch potential issues if smoothed_curve isn't 2D
+        target_minutes = target_seconds / 60.0
+
+        # Uniform-grid lookup: the slot index replaces np.interp's binary
+        # search, leaving two reads and a linear blend between neighbors.
+        # Valid inputs cap at 1439.98 minutes, inside the grid, so no
+        # clamping is needed. Round here so the memo stores the display
+        # value and per-request work stays pure assembly.
+        idx = target_minutes / LUT_STEP
+        i = int(idx)
+        frac = idx - i
+        lut = MODEL_LUT
+        return round(float(lut[i] * (1.0 - frac) + lut[i + 1] * frac), 2)
+
+    except IndexError as e: # Catch out-of-grid access if the LUT is malformed
          logger.error(f"IndexError during prediction calculation (check model data format): {e}")
          return None
     except Exception as e:
-        logger.error(f"Unexpected error during prediction calculation for time '{target_time_str}': {e}")
+        logger.error(f"Unexpected error during prediction calculation for {target_seconds}s: {e}")
         return None
 
 
@@ -206,7 +304,7 @@ async def get_next_delay_prediction(
     time_str: str = Query(
         ...,
         description="User's current/desired time in HH:MM:SS format.",
-        regex="^([01]\d|2[0-3]):([0-5]\d):([0-5]\d)$" # Regex for HH:MM:SS validation
+        regex=_HMS_PATTERN.pattern # Same compiled HH:MM:SS rule as the batch endpoint
     )
 ):
     """
@@ -218,54 +316,115 @@ async def get_next_delay_prediction(
     logger.info(f"Next delay prediction requested for time >= {time_str}")
 
     # 1. Find the next scheduled time using the helper
-    next_schedule_time_obj = find_next_scheduled_time(time_str)
+    next_schedule_secs = find_next_scheduled_time(time_str)
 
-    # Handle case where no next time is found (includes bus data errors)
-    if next_schedule_time_obj is None:
+    # Handle case where no next time is found (includes bus data errors).
+    # The query regex already rejected malformed times, so no format re-check
+    # is needed to pick the message here.
+    if next_schedule_secs is None:
         logger.warning(f"Could not find a valid scheduled bus time at or after {time_str}.")
-        # Check if the reason was invalid user input time format
-        try:
-            datetime.strptime(time_str, '%H:%M:%S')
-            message = "No scheduled bus found at or after the requested time in the historical data."
-        except ValueError:
-             message = "Invalid requested time format provided."
-
-        return NextPredictionResponse(
-            requested_time=time_str,
-            next_scheduled_time_used=None,
-            predicted_delay_minutes=None,
-            message=message
-        )
-
-    # Format the found time for prediction input and response
-    next_schedule_time_str = next_schedule_time_obj.strftime('%H:%M:%S')
+        message = "No scheduled bus found at or after the requested time in the historical data."
+
+        return ORJSONResponse({
+            "requested_time": time_str,
+            "next_scheduled_time_used": None,
+            "predicted_delay_minutes": None,
+            "message": message,
+        })
+
+    # Format for display exactly once; prediction and memoization stay on ints
+    next_schedule_time_str = (
+        f"{next_schedule_secs // 3600:02d}:"
+        f"{(next_schedule_secs % 3600) // 60:02d}:"
+        f"{next_schedule_secs % 60:02d}"
+    )
     logger.info(f"Found next scheduled time: {next_schedule_time_str}. Predicting delay for this time.")
 
     # 2. Predict delay for the found scheduled time
-    predicted_value = predict_delay_from_model(MODEL_DATA, next_schedule_time_str)
+    predicted_value = predict_delay_from_model(next_schedule_secs)
 
     # Handle successful prediction
     if predicted_value is not None:
-        return NextPredictionResponse(
-            requested_time=time_str,
-            next_scheduled_time_used=next_schedule_time_str,
-            predicted_delay_minutes=round(predicted_value, 2),
-            message="Prediction successful for the next scheduled bus time."
-        )
+        return ORJSONResponse({
+            "requested_time": time_str,
+            "next_scheduled_time_used": next_schedule_time_str,
+            "predicted_delay_minutes": predicted_value,
+            "message": "Prediction successful for the next scheduled bus time.",
+        })
     # Handle prediction failure for the found time
     else:
         logger.error(f"AI model failed to predict delay for the found time: {next_schedule_time_str}")
-        return NextPredictionResponse(
-            requested_time=time_str,
-            next_scheduled_time_used=next_schedule_time_str,
-            predicted_delay_minutes=None,
-            message=f"Found next schedule time ({next_schedule_time_str}), but failed to get AI prediction for it. Check server logs."
-        )
+        return ORJSONResponse({
+            "requested_time": time_str,
+            "next_scheduled_time_used": next_schedule_time_str,
+            "predicted_delay_minutes": None,
+            "message": f"Found next schedule time ({next_schedule_time_str}), but failed to get AI prediction for it. Check server logs.",
+        })
+
 
-# --- Optional: Keep or remove the original endpoint ---
-# If you want to keep the endpoint that predicts for the *exact* time given:
-# from pydantic import BaseModel as PredictionResponse # Define or import original model
-# @router.get("/predict-delay", response_model=PredictionResponse)
-# async def get_delay_prediction(...): ... (original logic)
+# --- API Endpoint for Batch Prediction ---
+@router.post("/predict-next-delay/batch", response_model=List[NextPredictionResponse])
+async def get_batch_delay_predictions(payload: BatchPredictionRequest):
+    """
+    Batch form of /predict-next-delay: snaps every requested time to the next
+    scheduled bus and predicts its delay, in one round-trip. All inputs are
+    snapped with a single vectorized searchsorted and evaluated against the
+    lookup table in one pass, so the cost is one HTTP exchange plus two NumPy
+    calls regardless of batch size.
+    """
+    check_model_loaded()
+    check_bus_data_loaded()
+
+    times = payload.times
+    if len(times) > MAX_BATCH_TIMES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_BATCH_TIMES} times per batch (got {len(times)})."
+        )
+    for t in times:
+        if not _HMS_PATTERN.match(t):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid time format (expected HH:MM:SS): '{t}'"
+            )
+    if not times:
+        return ORJSONResponse([])
+
+    logger.info(f"Batch delay prediction requested for {len(times)} times.")
+
+    user_secs = np.array(
+        [int(t[0:2]) * 3600 + int(t[3:5]) * 60 + int(t[6:8]) for t in times],
+        dtype=np.int32,
+    )
 
-# --- (End of file) ---
+    # Snap the whole batch at once; entries past the last schedule of the day
+    # get no prediction, mirroring the single endpoint
+    sched_seconds = bus_data.UNIQUE_SCHED_SECONDS
+    pos = sched_seconds.searchsorted(user_secs, side='left')
+    found = pos < sched_seconds.size
+    snapped = sched_seconds[np.minimum(pos, sched_seconds.size - 1)]
+
+    # One vectorized pass over the lookup table for every snapped time
+    idx = snapped.astype(np.float64) / 60.0 / LUT_STEP
+    i = idx.astype(np.int64)
+    frac = idx - i
+    preds = np.round(MODEL_LUT[i] * (1.0 - frac) + MODEL_LUT[i + 1] * frac, 2).tolist()
+
+    results = []
+    for k, t in enumerate(times):
+        if found[k]:
+            sec = int(snapped[k])
+            results.append({
+                "requested_time": t,
+                "next_scheduled_time_used": f"{sec // 3600:02d}:{(sec % 3600) // 60:02d}:{sec % 60:02d}",
+                "predicted_delay_minutes": preds[k],
+                "message": "Prediction successful for the next scheduled bus time.",
+            })
+        else:
+            results.append({
+                "requested_time": t,
+                "next_scheduled_time_used": None,
+                "predicted_delay_minutes": None,
+                "message": "No scheduled bus found at or after the requested time in the historical data.",
+            })
+    return ORJSONResponse(results)